@@ -1,13 +1,23 @@
 import os
 import random
-import json
+import uuid
+import functools
+import math
+import threading
+import orjson
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from flask import Flask, render_template, request, session, jsonify, redirect, url_for, flash
-from flask_session import Session
+from flask.json.provider import DefaultJSONProvider
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate, upgrade as flask_migrate_upgrade
+from flask_compress import Compress
 from flask_login import LoginManager, login_user, logout_user, login_required, UserMixin, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import func
 from sqlalchemy.exc import OperationalError
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from dotenv import load_dotenv
 from datetime import datetime
 
@@ -16,18 +26,40 @@ load_dotenv()
 
 # --------------------- Load Levels Configuration ---------------------
 
-with open('levels.json', 'r') as f:
-    LEVELS = json.load(f)
+with open('levels.json', 'rb') as f:
+    LEVELS = orjson.loads(f.read())
+
+# Index levels by id for constant-time lookups in request handlers
+LEVELS_BY_ID = {level['id']: level for level in LEVELS}
+# Position of each level in the campaign, used to rank level completions
+LEVEL_INDICES = {level['id']: idx for idx, level in enumerate(LEVELS)}
 
 # --------------------- Define Global Variables ---------------------
 
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that encodes with orjson; types it can't handle fall back to Flask's default."""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # orjson takes no formatting options; callers that pass them (e.g. the session
+            # serializer's separators) get the stdlib encoder they asked for
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Same arguments as jsonify(); encoded by dumps() without the debug indent and sort_keys options
+        if args and kwargs:
+            raise TypeError("app.json.response() takes either args or kwargs, not both")
+        obj = args[0] if len(args) == 1 else (args or kwargs or None)
+        return self._app.response_class(self.dumps(obj), mimetype=self.mimetype)
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 app.secret_key = os.environ.get('SECRET_KEY', 'your-secret-key')  # Secure your secret key
 
-# Session configuration
-app.config['SESSION_TYPE'] = 'filesystem'
-Session(app)
-
 # Adjust the database URI to be compatible with SQLAlchemy
 uri = os.environ.get('DATABASE_URL')  # Get the database URL from environment
 
@@ -44,6 +76,11 @@ else:
 
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Compress rendered pages and API responses; tiny JSON replies fall under COMPRESS_MIN_SIZE and go out as-is
+app.config['COMPRESS_MIMETYPES'] = ['text/html', 'application/json']
+app.config['COMPRESS_LEVEL'] = 6
+Compress(app)
+
 db = SQLAlchemy(app)
 migrate = Migrate(app, db)
 
@@ -70,15 +107,42 @@ DIRECTIONS = {
     'STAY': (0, 0)     # Stay
 }
 
-def clear_screen():
-    """Clear the terminal screen for better readability."""
-    os.system('cls' if os.name == 'nt' else 'clear')
+# Canonical move name and direction for the spellings clients send, resolved with one lookup
+MOVES = {name: (name, direction) for name, direction in DIRECTIONS.items()}
+MOVES.update({name.lower(): (name, direction) for name, direction in DIRECTIONS.items()})
+STAY_DIRECTION = DIRECTIONS['STAY']
 
-def is_adjacent_to_player_start(pos, player_start_pos, distance=1):
+# Offsets of the cells within Manhattan distance 1 of the player start, which no sector may cover
+START_EXCLUSION_OFFSETS = ((0, 0), (-1, 0), (1, 0), (0, -1), (0, 1))
+
+def start_box_exit_move(player_start_pos, GRID_ROWS, GRID_COLS):
     """
-    Check if a position is within a certain distance from the player's starting position.
+    Get the only move (besides STAY) into or out of the start box,
+    which sits just outside one edge of the grid.
     """
-    return abs(pos[0] - player_start_pos[0]) + abs(pos[1] - player_start_pos[1]) <= distance
+    if player_start_pos[0] == -1:
+        return 'DOWN'
+    elif player_start_pos[0] == GRID_ROWS:
+        return 'UP'
+    elif player_start_pos[1] == -1:
+        return 'RIGHT'
+    elif player_start_pos[1] == GRID_COLS:
+        return 'LEFT'
+    return None  # Should not happen
+
+# Per-level values that never change during a game, resolved once per process
+LEVEL_CACHE = {
+    level['id']: {
+        'grid_rows': level['grid_rows'],
+        'grid_cols': level['grid_cols'],
+        'player_start_pos': tuple(level['player_start_pos']),
+        'end_pos': tuple(level['end_pos']),
+        # Moves accepted into or out of the start box
+        'start_box_moves': frozenset({'STAY', start_box_exit_move(
+            level['player_start_pos'], level['grid_rows'], level['grid_cols']
+        )})
+    } for level in LEVELS
+}
 
 # --------------------- User Model ---------------------
 
@@ -96,6 +160,12 @@ class User(db.Model, UserMixin):
 
 class UserLevelStats(db.Model):
     __tablename__ = 'user_level_stats'
+    __table_args__ = (
+        # Also serves as the index for per-user, per-level lookups
+        db.UniqueConstraint('user_id', 'level_id', name='uq_user_level'),
+        # Level leaderboard: completed entries for one level
+        db.Index('ix_user_level_stats_level_completed', 'level_id', 'completed'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     level_id = db.Column(db.String(50), nullable=False)
@@ -146,6 +216,8 @@ GROUP_DEFINITIONS = [
 ]
 
 class DroneGroup:
+    __slots__ = ('symbol', 'sector_shape', 'patrol_route', 'max_row_offset', 'max_col_offset')
+
     def __init__(self, symbol, sector_shape, patrol_route):
         """
         Initialize a drone group.
@@ -153,161 +225,222 @@ class DroneGroup:
         self.symbol = symbol
         self.sector_shape = sector_shape
         self.patrol_route = patrol_route
-        self.drones = []
+        # Extent of the sector shape, used to bound sector origins during placement
+        self.max_row_offset = max(r for r, c in sector_shape)
+        self.max_col_offset = max(c for r, c in sector_shape)
+
+# Drone groups are immutable, so build them once instead of on every request
+DRONE_GROUPS_BY_SYMBOL = {
+    group_def['symbol']: DroneGroup(group_def['symbol'], group_def['sector_shape'], group_def['patrol_route'])
+    for group_def in GROUP_DEFINITIONS
+}
+# The same groups in definition order, which drone placement follows
+DRONE_GROUPS = tuple(DRONE_GROUPS_BY_SYMBOL.values())
 
-class Drone:
-    def __init__(self, group, sector_origin, GRID_ROWS, GRID_COLS):
-        """
-        Initialize a drone.
-        """
-        self.symbol = group.symbol
-        self.group = group
-        self.sector_origin = sector_origin
-        self.GRID_ROWS = GRID_ROWS
-        self.GRID_COLS = GRID_COLS
-        self.sector = self.calculate_sector()
-        self.patrol_route = self.calculate_patrol_route()
-        self.route_length = len(self.patrol_route)
-        self.route_index = 0
-        self.direction = 1  # 1 for forward, -1 for backward
-        self.position = self.patrol_route[self.route_index]
-
-    def calculate_sector(self):
-        """
-        Calculate the absolute positions of the drone's sector.
-        """
-        sector = set()
-        for rel_pos in self.group.sector_shape:
-            abs_pos = (self.sector_origin[0] + rel_pos[0], self.sector_origin[1] + rel_pos[1])
-            sector.add(abs_pos)
-        return sector
+def resolve_patrol_route(patrol_route, sector_origin, GRID_ROWS, GRID_COLS):
+    """
+    Translate a group's relative patrol route to absolute grid positions.
+    """
+    route = []
+    for rel_pos in patrol_route:
+        abs_pos = (sector_origin[0] + rel_pos[0], sector_origin[1] + rel_pos[1])
+        # Ensure patrol route is within grid boundaries
+        if 0 <= abs_pos[0] < GRID_ROWS and 0 <= abs_pos[1] < GRID_COLS:
+            route.append(abs_pos)
+        else:
+            # Adjust to stay within grid
+            clamped_r = max(0, min(GRID_ROWS - 1, abs_pos[0]))
+            clamped_c = max(0, min(GRID_COLS - 1, abs_pos[1]))
+            route.append((clamped_r, clamped_c))
+    return tuple(route)
+
+@functools.lru_cache(maxsize=4096)
+def patrol_route_for(symbol, sector_origin, GRID_ROWS, GRID_COLS):
+    """
+    Cached absolute patrol route for a drone of the given group at sector_origin.
+    """
+    return resolve_patrol_route(DRONE_GROUPS_BY_SYMBOL[symbol].patrol_route, sector_origin, GRID_ROWS, GRID_COLS)
 
-    def calculate_patrol_route(self):
-        """
-        Calculate the patrol route within the sector.
-        """
-        route = []
-        for rel_pos in self.group.patrol_route:
-            abs_pos = (self.sector_origin[0] + rel_pos[0], self.sector_origin[1] + rel_pos[1])
-            # Ensure patrol route is within grid boundaries
-            if 0 <= abs_pos[0] < self.GRID_ROWS and 0 <= abs_pos[1] < self.GRID_COLS:
-                route.append(abs_pos)
-            else:
-                # Adjust to stay within grid
-                clamped_r = max(0, min(self.GRID_ROWS - 1, abs_pos[0]))
-                clamped_c = max(0, min(self.GRID_COLS - 1, abs_pos[1]))
-                route.append((clamped_r, clamped_c))
-        return route
-
-    def move(self):
-        """
-        Move the drone along its patrol route.
-        """
-        if self.route_length <= 1:
-            print(f"Warning: Drone {self.symbol} has an insufficient patrol route and cannot move.")
-            return  # Drone cannot move due to insufficient patrol route
+# --------------------- Game State ---------------------
 
-        next_index = self.route_index + self.direction
+MAX_TURNS = 200
 
-        # Check if we need to reverse direction
-        if next_index >= self.route_length or next_index < 0:
-            self.direction *= -1  # Reverse direction
-            next_index = self.route_index + self.direction
+@dataclass(frozen=True)
+class DroneSchedule:
+    """
+    Drone state after every step of one full drone cycle.
 
-        self.route_index = next_index
-        self.position = self.patrol_route[self.route_index]
+    Drone movement doesn't depend on the player, so every game of a level
+    sees the same drones at the same step. Entry k holds the state after
+    any step count congruent to k modulo period.
+    """
+    period: int
+    positions: tuple  # Per phase (step % period): a tuple of drone positions, in drone order
+    occupancy: tuple  # Per phase (step % period): bytes of per-cell drone counts, indexed by r * grid_cols + c
+    moves: tuple  # Per phase (step % period): moves of the drones that changed cell on the step into it
+
+@dataclass
+class GameState:
+    """
+    Mutable state of a single web game, kept in memory between requests.
+    """
+    level_id: str
+    grid_rows: int
+    grid_cols: int
+    player_start_pos: tuple
+    end_pos: tuple
+    player_r: int
+    player_c: int
+    start_box_moves: frozenset = frozenset({'STAY'})  # Moves accepted into or out of the start box
+    drone_symbols: tuple = ()
+    # Shared by every game of the level; the game itself only tracks its step count
+    drone_schedule: DroneSchedule = field(default=None, repr=False)
+    drone_step: int = 0  # Steps taken so far; all drones advance together
+    turn: int = 0
+    max_turns: int = MAX_TURNS
+    game_over: bool = False
+    won: bool = False
+    message: str = ''
+
+    @property
+    def drone_phase(self):
+        return self.drone_step % self.drone_schedule.period
+
+    @property
+    def drone_positions(self):
+        return self.drone_schedule.positions[self.drone_phase]
+
+    @property
+    def drone_occupancy(self):
+        return self.drone_schedule.occupancy[self.drone_phase]
+
+    @property
+    def drone_moves(self):
+        """Moves made by the drones on the most recent step."""
+        return self.drone_schedule.moves[self.drone_phase]
+
+# Active games keyed by the game_id stored in each user's session cookie, least recently used first.
+# Bounded so abandoned games don't accumulate in the worker's memory. Games live only in this
+# process, so the Procfile runs a single gunicorn worker with several threads; every access to
+# GAMES holds GAMES_LOCK so a lookup and its LRU bump can't interleave with an eviction.
+GAMES = OrderedDict()
+GAMES_LOCK = threading.Lock()
+MAX_ACTIVE_GAMES = int(os.environ.get('MAX_ACTIVE_GAMES', 1000))
 
 # --------------------- Game Initialization ---------------------
 
 def initialize_game(GRID_ROWS, GRID_COLS, PLAYER_START_POS, END_POS, NUM_DRONES, NUM_DRONE_GROUPS, RANDOM_SEED):
     """
     Initialize the game state with drones and their patrol routes.
+
+    Each drone is returned as a spec dict holding its symbol, sector origin,
+    resolved absolute patrol route and starting position.
     """
     # Initialize player and end positions
     player_pos = PLAYER_START_POS
     end_pos = END_POS
 
-    # Create drone groups
-    drone_groups = []
-    for group_def in GROUP_DEFINITIONS:
-        group = DroneGroup(group_def['symbol'], group_def['sector_shape'], group_def['patrol_route'])
-        drone_groups.append(group)
-
     # Distribute drones among groups
     drones_per_group = [NUM_DRONES // NUM_DRONE_GROUPS] * NUM_DRONE_GROUPS
     for i in range(NUM_DRONES % NUM_DRONE_GROUPS):
         drones_per_group[i] += 1  # Distribute remainder
 
     # Initialize drones and assign sectors
-    drones = []
-    assigned_positions = set()  # Positions already assigned to sectors
+    drone_specs = []
+
+    # Flat mask of cells a new sector may not use, indexed by r * GRID_COLS + c.
+    # Starts with the cells next to the player start and grows as sectors are assigned.
+    blocked = bytearray(GRID_ROWS * GRID_COLS)
+    start_r, start_c = PLAYER_START_POS
+    for dr, dc in START_EXCLUSION_OFFSETS:
+        r, c = start_r + dr, start_c + dc
+        if 0 <= r < GRID_ROWS and 0 <= c < GRID_COLS:
+            blocked[r * GRID_COLS + c] = 1
 
-    # Set the random seed for reproducibility
-    if RANDOM_SEED is not None:
-        random.seed(RANDOM_SEED)
+    # Seeded for reproducibility; a local generator keeps concurrent builds from sharing draws
+    rng = random.Random(RANDOM_SEED)
 
-    for i, group in enumerate(drone_groups):
+    for i, group in enumerate(DRONE_GROUPS):
         num_drones_in_group = drones_per_group[i]
+        # Origins already found to overlap a blocked cell. Cells are never
+        # unblocked, so these can be skipped without rebuilding the sector.
+        rejected_origins = set()
+        max_row = GRID_ROWS - group.max_row_offset
+        max_col = GRID_COLS - group.max_col_offset
+        # Sector shape as flat index offsets, translated to each candidate origin by one addition
+        sector_offsets = [r * GRID_COLS + c for r, c in group.sector_shape]
+        unplaced = 0
         for _ in range(num_drones_in_group):
             # Find a valid sector origin
             sector_placed = False
             for attempt in range(100):  # Limit attempts to prevent infinite loops
-                max_row = GRID_ROWS - max(r for r, c in group.sector_shape)
-                max_col = GRID_COLS - max(c for r, c in group.sector_shape)
                 if max_row <= 0 or max_col <= 0:
                     continue  # Sector shape is too large for the grid
-                origin_row = random.randint(0, max_row - 1)
-                origin_col = random.randint(0, max_col - 1)
-                sector_origin = (origin_row, origin_col)
-                sector = set((sector_origin[0] + r, sector_origin[1] + c) for r, c in group.sector_shape)
+                origin_row = rng.randint(0, max_row - 1)
+                origin_col = rng.randint(0, max_col - 1)
+                # Origins are tracked by their flat index r * GRID_COLS + c
+                origin_idx = origin_row * GRID_COLS + origin_col
+                if origin_idx in rejected_origins:
+                    continue
+                rejected_origins.add(origin_idx)
+                sector_cells = [origin_idx + offset for offset in sector_offsets]
 
                 # Check if sector overlaps with assigned positions or is adjacent to player start
-                if sector.isdisjoint(assigned_positions) and not any(is_adjacent_to_player_start(pos, PLAYER_START_POS) for pos in sector):
-                    assigned_positions.update(sector)
-                    drone = Drone(group, sector_origin, GRID_ROWS, GRID_COLS)
-                    drones.append(drone)
-                    group.drones.append(drone)
+                if not any(blocked[idx] for idx in sector_cells):
+                    for idx in sector_cells:
+                        blocked[idx] = 1
+                    sector_origin = (origin_row, origin_col)
+                    patrol_route = patrol_route_for(group.symbol, sector_origin, GRID_ROWS, GRID_COLS)
+                    drone_specs.append({
+                        'symbol': group.symbol,
+                        'sector_origin': sector_origin,
+                        'patrol_route': patrol_route,
+                        'position': patrol_route[0]
+                    })
                     sector_placed = True
                     break
 
             if not sector_placed:
-                print(f"Warning: Could not place a sector for drone in group {group.symbol}")
-                continue
+                unplaced += 1
 
-    return player_pos, end_pos, drones
+        # Report each group's shortfall once instead of printing per drone
+        if unplaced:
+            print(f"Warning: Could not place a sector for {unplaced} drone(s) in group {group.symbol}")
 
-def update_user_stats(won):
-    level_id = session.get('level_id')
-    if level_id is None:
-        level_id = 'unknown'  # Handle missing level_id
+    return player_pos, end_pos, drone_specs
 
+def update_user_stats(level_id, won):
     # Update total tries
     current_user.total_tries = (current_user.total_tries or 0) + 1
 
     # Update per-level tries
-    # Find or create UserLevelStats for this user and level
-    level_stats = UserLevelStats.query.filter_by(user_id=current_user.id, level_id=level_id).first()
-    if level_stats is None:
-        level_stats = UserLevelStats(user_id=current_user.id, level_id=level_id, tries=1)
-        db.session.add(level_stats)
-    else:
-        level_stats.tries += 1
+    # Create or update UserLevelStats for this user and level in a single upsert
+    insert = postgresql_insert if db.engine.dialect.name == 'postgresql' else sqlite_insert
+    stmt = insert(UserLevelStats).values(
+        user_id=current_user.id,
+        level_id=level_id,
+        tries=1,
+        completed=won,
+        completion_date=datetime.utcnow() if won else None
+    )
+    update_values = {'tries': UserLevelStats.tries + 1}
+    if won:
+        # Keep the first completion date
+        update_values['completed'] = True
+        update_values['completion_date'] = func.coalesce(UserLevelStats.completion_date,
+                                                         stmt.excluded.completion_date)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'level_id'], set_=update_values
+    ).returning(UserLevelStats.tries)
+    level_tries = db.session.execute(stmt).scalar()
 
     # If the user has won, update highest_level_completed if necessary
     if won:
-        level_stats.completed = True
-
-        # Set completion date if not already set
-        if level_stats.completion_date is None:
-            level_stats.completion_date = datetime.utcnow()
-
-        # Determine level order
-        level_indices = {level['id']: idx for idx, level in enumerate(LEVELS)}
-        current_level_index = level_indices.get(level_id, -1)
+        current_level_index = LEVEL_INDICES.get(level_id, -1)
 
         # Get current highest level index
         if current_user.highest_level_completed:
-            highest_level_index = level_indices.get(current_user.highest_level_completed, -1)
+            highest_level_index = LEVEL_INDICES.get(current_user.highest_level_completed, -1)
         else:
             highest_level_index = -1
 
@@ -320,7 +453,6 @@ def update_user_stats(won):
     # Return updated stats
     total_tries = current_user.total_tries
     highest_level_completed = current_user.highest_level_completed or 'None'
-    level_tries = level_stats.tries
 
     return {
         'total_tries': total_tries,
@@ -328,48 +460,93 @@ def update_user_stats(won):
         'level_tries': level_tries
     }
 
-def draw_grid(player_pos, end_pos, drones, GRID_ROWS_, GRID_COLS_):
+def step_drones(cycles, step, positions, occupancy, GRID_COLS):
+    """
+    Move every drone to its position after `step` steps, in place,
+    keeping the per-cell occupancy counts in sync.
+    Returns the moves of the drones that changed cell, built in the same pass;
+    the client applies them to its copy of the drone positions by index.
+
+    Each cycle holds a drone's positions over one full trip out along its
+    patrol route and back, so the position after `step` steps is a single
+    index, without tracking a direction per drone.
+    """
+    moves = []
+    for i in range(len(cycles)):
+        cycle = cycles[i]
+        old_pos = positions[i]
+        new_pos = positions[i] = cycle[step % len(cycle)]
+        if new_pos == old_pos:
+            continue  # Includes drones whose patrol route is a single cell
+        occupancy[old_pos[0] * GRID_COLS + old_pos[1]] -= 1
+        occupancy[new_pos[0] * GRID_COLS + new_pos[1]] += 1
+        moves.append({'index': i, 'from': old_pos, 'to': new_pos})
+    return moves
+
+def build_drone_schedule(cycles, GRID_ROWS, GRID_COLS):
+    """
+    Step the drones through one full cycle, recording the state after each step.
+
+    The drones repeat once every drone has finished a whole number of cycles,
+    so the schedule is as long as the least common multiple of the cycle
+    lengths, capped at MAX_TURNS + 1 steps since no game runs longer.
+    """
+    period = min(math.lcm(*(len(cycle) for cycle in cycles)), MAX_TURNS + 1)
+
+    positions = [cycle[0] for cycle in cycles]
+    occupancy = bytearray(GRID_ROWS * GRID_COLS)
+    for r, c in positions:
+        occupancy[r * GRID_COLS + c] += 1
+
+    position_snapshots = [tuple(positions)]
+    occupancy_snapshots = [bytes(occupancy)]
+    moves = [[] for _ in range(period)]
+    for step in range(1, period + 1):
+        moves[step % period] = step_drones(cycles, step, positions, occupancy, GRID_COLS)
+        if step < period:
+            position_snapshots.append(tuple(positions))
+            occupancy_snapshots.append(bytes(occupancy))
+
+    return DroneSchedule(period, tuple(position_snapshots), tuple(occupancy_snapshots), tuple(moves))
+
+def draw_grid(player_pos, end_pos, drone_symbols, drone_positions, GRID_ROWS_, GRID_COLS_):
     """
     Create the current state of the grid.
     """
-    grid = [[EMPTY_SYMBOL for _ in range(GRID_COLS_)] for _ in range(GRID_ROWS_)]
+    # Build the grid as one flat row-major list indexed by r * GRID_COLS_ + c
+    grid = [EMPTY_SYMBOL] * (GRID_ROWS_ * GRID_COLS_)
 
     # Place the end position
     er, ec = end_pos
-    grid[er][ec] = END_SYMBOL
+    grid[er * GRID_COLS_ + ec] = END_SYMBOL
 
-    # Place drones
-    drone_positions = {}
-    for drone in drones:
-        r, c = drone.position
+    # Place drones, remembering the first symbol placed in each cell
+    first_symbols = [None] * (GRID_ROWS_ * GRID_COLS_)
+    for symbol, (r, c) in zip(drone_symbols, drone_positions):
         if (r, c) == player_pos:
             continue  # Collision handled separately
-        if (r, c) in drone_positions:
-            drone_positions[(r, c)].add(drone.symbol)
-        else:
-            drone_positions[(r, c)] = {drone.symbol}
-
-    for (r, c), symbols in drone_positions.items():
-        if len(symbols) == 1:
-            grid[r][c] = symbols.pop()
-        else:
-            grid[r][c] = '*'  # Indicate multiple drones
+        idx = r * GRID_COLS_ + c
+        first_symbol = first_symbols[idx]
+        if first_symbol is None:
+            first_symbols[idx] = symbol
+            grid[idx] = symbol
+        elif first_symbol != symbol:
+            grid[idx] = '*'  # Indicate multiple drones
 
     # Place the player if within grid boundaries
     pr, pc = player_pos
     if 0 <= pr < GRID_ROWS_ and 0 <= pc < GRID_COLS_:
-        grid[pr][pc] = PLAYER_SYMBOL
+        grid[pr * GRID_COLS_ + pc] = PLAYER_SYMBOL
 
-    return grid
+    # Split into rows for the client
+    return [grid[r * GRID_COLS_:(r + 1) * GRID_COLS_] for r in range(GRID_ROWS_)]
 
-def is_collision(player_pos, drones):
+def is_collision(pr, pc, drone_occupancy, GRID_COLS):
     """
     Check if the player has collided with any drone.
+    The player position must be within the grid.
     """
-    for drone in drones:
-        if player_pos == drone.position:
-            return True
-    return False
+    return drone_occupancy[pr * GRID_COLS + pc] != 0
 
 # --------------------- Flask Web Interface ---------------------
 
@@ -423,9 +600,25 @@ def logout():
     flash('You have been logged out.')
     return redirect(url_for('login'))
 
+# Pages whose HTML depends only on LEVELS are rendered once per worker and reused.
+# level_selection is not cached: it shows the current user and flashed messages.
+@functools.lru_cache(maxsize=None)
+def render_home():
+    return render_template('home.html')
+
+@functools.lru_cache(maxsize=None)
+def render_level_intro(level_id):
+    level_config = LEVELS_BY_ID[level_id]
+
+    # Get intro text and print speed
+    intro_text = level_config.get('intro_text', '')
+    print_speed = level_config.get('print_speed', 200)  # Default to 200ms if not specified
+
+    return render_template('level_intro.html', intro_text=intro_text, print_speed=print_speed, level_id=level_id)
+
 @app.route('/')
 def home():
-    return render_template('home.html')
+    return render_home()
 
 @app.route('/level_selection')
 @login_required
@@ -436,365 +629,279 @@ def level_selection():
 @app.route('/level_intro/<level_id>')
 def level_intro(level_id):
     # Find the level configuration
-    level_config = next((level for level in LEVELS if level['id'] == level_id), None)
+    level_config = LEVELS_BY_ID.get(level_id)
     if not level_config:
         return "Level not found", 404
 
-    # Store level configuration in session
-    session['level_config'] = level_config
-
-    # Get intro text and print speed
-    intro_text = level_config.get('intro_text', '')
-    print_speed = level_config.get('print_speed', 200)  # Default to 200ms if not specified
-
-    return render_template('level_intro.html', intro_text=intro_text, print_speed=print_speed, level_id=level_id)
+    return render_level_intro(level_id)
 
 @app.route('/start_game/<level_id>')
 @login_required
 def start_game(level_id):
     # Find the level configuration
-    level_config = next((level for level in LEVELS if level['id'] == level_id), None)
+    level_config = LEVELS_BY_ID.get(level_id)
     if not level_config:
         return "Level not found", 404
 
-    # Store level configuration in session
-    session['level_config'] = level_config
     session['level_id'] = level_id  # Store level_id in session
-    session['initialized'] = False  # Reset game initialization
+    with GAMES_LOCK:
+        GAMES.pop(session.get('game_id'), None)  # Reset game initialization
 
     return redirect(url_for('game'))
 
-def initialize_web_game():
-    """Initialize the game state for the web version."""
-    level_config = session['level_config']
+def build_drone_layout(level_id):
+    """
+    Place a level's drones, returning their symbols and DroneSchedule.
 
-    # Extract level parameters
-    GRID_ROWS = level_config['grid_rows']
-    GRID_COLS = level_config['grid_cols']
-    PLAYER_START_POS = tuple(level_config['player_start_pos'])
-    END_POS = tuple(level_config['end_pos'])
-    NUM_DRONES = level_config['num_drones']
-    NUM_DRONE_GROUPS = level_config['num_drone_groups']
+    Drones bounce back and forth along their patrol route, so each route is
+    unrolled into the full out-and-back cycle: route + route reversed
+    without its end points.
+    """
+    level_config = LEVELS_BY_ID[level_id]
+    level = LEVEL_CACHE[level_id]
 
     # Set random seed for reproducibility
     RANDOM_SEED = level_config['random_seed']
     # RANDOM_SEED = level_config.get('random_seed', None)
 
+    _, _, drone_specs = initialize_game(
+        level['grid_rows'], level['grid_cols'], level['player_start_pos'], level['end_pos'],
+        level_config['num_drones'], level_config['num_drone_groups'], RANDOM_SEED
+    )
+    drone_symbols = tuple(spec['symbol'] for spec in drone_specs)
+    drone_cycles = [spec['patrol_route'] + spec['patrol_route'][-2:0:-1] for spec in drone_specs]
+    return drone_symbols, build_drone_schedule(drone_cycles, level['grid_rows'], level['grid_cols'])
+
+# Seeded levels place the same drones every game, so placement and the drone
+# schedule are computed once per level per worker
+initial_drone_layout = functools.lru_cache(maxsize=None)(build_drone_layout)
+
+def initialize_web_game(level_id=None):
+    """Initialize the game state for the web version, for the session's level unless given."""
+    if level_id is None:
+        level_id = session['level_id']
+    level = LEVEL_CACHE[level_id]
+
+    # Extract level parameters
+    GRID_ROWS = level['grid_rows']
+    GRID_COLS = level['grid_cols']
+    PLAYER_START_POS = level['player_start_pos']
+
     # Initialize game state
-    player_pos, end_pos, drones = initialize_game(
-        GRID_ROWS, GRID_COLS, PLAYER_START_POS, END_POS, NUM_DRONES, NUM_DRONE_GROUPS, RANDOM_SEED
+    if LEVELS_BY_ID[level_id]['random_seed'] is not None:
+        drone_symbols, drone_schedule = initial_drone_layout(level_id)
+    else:
+        drone_symbols, drone_schedule = build_drone_layout(level_id)
+    game = GameState(
+        level_id=level_id,
+        grid_rows=GRID_ROWS,
+        grid_cols=GRID_COLS,
+        player_start_pos=PLAYER_START_POS,
+        end_pos=level['end_pos'],
+        player_r=PLAYER_START_POS[0],
+        player_c=PLAYER_START_POS[1],
+        start_box_moves=level['start_box_moves'],
+        drone_symbols=drone_symbols,
+        drone_schedule=drone_schedule
     )
-    session['player_pos'] = player_pos
-    session['end_pos'] = end_pos
-    session['grid_rows'] = GRID_ROWS
-    session['grid_cols'] = GRID_COLS
-    session['player_start_pos'] = PLAYER_START_POS
-    session['turn'] = 0
-    session['max_turns'] = 200
-    # Store drones as list of dicts for serialization
-    session['drones'] = [
-        {
-            'symbol': drone.symbol,
-            'position': drone.position,
-            'route_index': drone.route_index,
-            'direction': drone.direction,
-            'sector_origin': drone.sector_origin
-        } for drone in drones
-    ]
-    session['game_over'] = False
-    session['message'] = ''
-    session['initialized'] = True
+
+    # Keep the game server-side; the session cookie only carries its id
+    game_id = session.get('game_id') or uuid.uuid4().hex
+    with GAMES_LOCK:
+        GAMES[game_id] = game
+        GAMES.move_to_end(game_id)
+        while len(GAMES) > MAX_ACTIVE_GAMES:
+            GAMES.popitem(last=False)
+    session['game_id'] = game_id
+    return game
+
+def find_current_game():
+    """Get the current session's game, or None if it is no longer in memory."""
+    game_id = session.get('game_id')
+    with GAMES_LOCK:
+        game = GAMES.get(game_id)
+        if game is not None:
+            GAMES.move_to_end(game_id)
+    return game
+
+def get_current_game():
+    """Get the current session's game, starting a new one if none is in memory."""
+    game = find_current_game()
+    if game is None:
+        return initialize_web_game()
+    return game
 
 @app.route('/game')
 @login_required
 def game():
     # Initialize the game if not already started
-    if not session.get('initialized', False):
-        initialize_web_game()
+    game = get_current_game()
+
+    # Render the first frame server-side; the client patches it from /game_state afterwards
+    grid = draw_grid((game.player_r, game.player_c), game.end_pos, game.drone_symbols, game.drone_positions,
+                     game.grid_rows, game.grid_cols)
 
     # Get user stats
     total_tries = current_user.total_tries or 0
     highest_level_completed = current_user.highest_level_completed or 'None'
 
     # Get per-level tries
-    level_id = session.get('level_id')
+    level_id = game.level_id
     level_stats = UserLevelStats.query.filter_by(user_id=current_user.id, level_id=level_id).first()
     level_tries = level_stats.tries if level_stats else 0
 
     return render_template('index.html', total_tries=total_tries,
                        highest_level_completed=highest_level_completed,
                        level_tries=level_tries,
-                       level_id=level_id) 
+                       level_id=level_id,
+                       grid=grid)
+
+@app.route('/game_config', methods=['GET'])
+@login_required
+def get_game_config():
+    game = get_current_game()
+
+    # Layout that stays fixed for the whole game; the client fetches it once on load
+    return jsonify({
+        'grid_rows': game.grid_rows,
+        'grid_cols': game.grid_cols,
+        'player_start_pos': game.player_start_pos,
+        'end_pos': game.end_pos,
+        'drone_symbols': game.drone_symbols
+    })
 
 @app.route('/game_state', methods=['GET'])
 @login_required
 def get_game_state():
-    GRID_ROWS = session['grid_rows']
-    GRID_COLS = session['grid_cols']
-    PLAYER_START_POS = tuple(session['player_start_pos'])
-    player_pos = tuple(session['player_pos'])
-    end_pos = tuple(session['end_pos'])
-    drones_data = session['drones']
-    drones = []
-
-    # Reconstruct drone groups
-    drone_groups = {group_def['symbol']: DroneGroup(
-        group_def['symbol'], group_def['sector_shape'], group_def['patrol_route']
-    ) for group_def in GROUP_DEFINITIONS}
-
-    # Reconstruct drones
-    for drone_data in drones_data:
-        symbol = drone_data['symbol']
-        position = tuple(drone_data['position'])
-        route_index = drone_data['route_index']
-        direction = drone_data['direction']
-        sector_origin = tuple(drone_data['sector_origin'])
-        group = drone_groups.get(symbol)
-        if not group:
-            continue  # Skip if group not found
-
-        drone = Drone(group, sector_origin, GRID_ROWS, GRID_COLS)
-        drone.position = position
-        drone.route_index = route_index
-        drone.direction = direction
-        drones.append(drone)
-
-    grid = draw_grid(player_pos, end_pos, drones, GRID_ROWS, GRID_COLS)
-
-    start_box_symbol = PLAYER_SYMBOL if player_pos == PLAYER_START_POS else EMPTY_SYMBOL
+    game = get_current_game()
 
+    # Only the per-turn state; drone positions line up with drone_symbols from /game_config
     return jsonify({
-        'grid': grid,
-        'start_box': {'position': PLAYER_START_POS, 'symbol': start_box_symbol},
-        'turn': session['turn'],
-        'game_over': session['game_over'],
-        'message': session.get('message', ''),
-        'player_pos': session['player_pos'],
-        'drones': [
-            {
-                'symbol': drone_data['symbol'],
-                'position': drone_data['position']
-            } for drone_data in session['drones']
-        ]
+        'player_pos': (game.player_r, game.player_c),
+        'drones': game.drone_positions,
+        'turn': game.turn,
+        'game_over': game.game_over,
+        'message': game.message
     })
 
-def is_valid_move_from_start_box(move, PLAYER_START_POS, GRID_ROWS, GRID_COLS):
-    if move == 'STAY':
-        return True  # Allow staying in the start position
-    if PLAYER_START_POS[0] == -1:
-        return move == 'DOWN'
-    elif PLAYER_START_POS[0] == GRID_ROWS:
-        return move == 'UP'
-    elif PLAYER_START_POS[1] == -1:
-        return move == 'RIGHT'
-    elif PLAYER_START_POS[1] == GRID_COLS:
-        return move == 'LEFT'
-    return False  # Should not happen
-
 @app.route('/move', methods=['POST'])
 @login_required
 def move():
-    if session.get('game_over', False):
-        return jsonify({'message': session.get('message', 'Game Over'), 'game_over': True})
-
-    GRID_ROWS = session['grid_rows']
-    GRID_COLS = session['grid_cols']
-    PLAYER_START_POS = tuple(session['player_start_pos'])
+    game = find_current_game()
+    if game is None:
+        # Evicted or lost with a worker restart; never apply the move to a fresh game
+        return jsonify({'message': "⌛ This game has expired. Press reset to start again.",
+                        'game_over': True, 'expired': True})
+    if game.game_over:
+        return jsonify({'message': game.message or 'Game Over', 'game_over': True})
+
+    GRID_ROWS = game.grid_rows
+    GRID_COLS = game.grid_cols
+    PLAYER_START_POS = game.player_start_pos
 
     data = request.get_json()
-    move = data.get('move')
-    move_dir = DIRECTIONS.get(move.upper(), DIRECTIONS['STAY'])
+    raw_move = data.get('move')
+    resolved = MOVES.get(raw_move)
+    if resolved is None:
+        # Other casings or an unknown move; unknown moves leave the player in place
+        move = raw_move.upper()
+        resolved = MOVES.get(move, (move, STAY_DIRECTION))
+    move, move_dir = resolved
+    valid_start_box_move = move in game.start_box_moves
 
-    player_pos = tuple(session['player_pos'])
-    old_player_pos = player_pos  # Record old position
+    start_r, start_c = PLAYER_START_POS
+    old_r, old_c = game.player_r, game.player_c  # Record old position
 
-    new_r = player_pos[0] + move_dir[0]
-    new_c = player_pos[1] + move_dir[1]
+    new_r = old_r + move_dir[0]
+    new_c = old_c + move_dir[1]
 
     # Enforce movement rules when in start box
-    if player_pos == PLAYER_START_POS:
-        if not is_valid_move_from_start_box(move, PLAYER_START_POS, GRID_ROWS, GRID_COLS):
-            session['message'] = "🚫 Invalid move from the start position."
-            return jsonify({'message': session['message'], 'game_over': False})
+    if old_r == start_r and old_c == start_c:
+        if not valid_start_box_move:
+            game.message = "🚫 Invalid move from the start position."
+            return jsonify({'message': game.message, 'game_over': False})
 
     # Enforce movement rules when moving back into the start box
-    if (new_r, new_c) == PLAYER_START_POS:
-        if not is_valid_move_from_start_box(move, PLAYER_START_POS, GRID_ROWS, GRID_COLS):
-            session['message'] = "🚫 Invalid move into the start position."
-            return jsonify({'message': session['message'], 'game_over': False})
+    in_start_box = new_r == start_r and new_c == start_c
+    if in_start_box:
+        if not valid_start_box_move:
+            game.message = "🚫 Invalid move into the start position."
+            return jsonify({'message': game.message, 'game_over': False})
 
     # Adjusted boundary checks
     if not (-1 <= new_r < GRID_ROWS) or not (-1 <= new_c < GRID_COLS):
-        session['message'] = "🚫 Move out of bounds. Try again."
-        return jsonify({'message': session['message'], 'game_over': False})
+        game.message = "🚫 Move out of bounds. Try again."
+        return jsonify({'message': game.message, 'game_over': False})
 
     # Update player's position AFTER all checks have passed
-    player_pos = (new_r, new_c)
-    session['player_pos'] = player_pos
-
-    # Reconstruct drone groups
-    drone_groups = {group_def['symbol']: DroneGroup(
-        group_def['symbol'], group_def['sector_shape'], group_def['patrol_route']
-    ) for group_def in GROUP_DEFINITIONS}
-
-    # Reconstruct drones
-    drones = []
-    for drone_data in session['drones']:
-        symbol = drone_data['symbol']
-        position = tuple(drone_data['position'])
-        route_index = drone_data['route_index']
-        direction = drone_data['direction']
-        sector_origin = tuple(drone_data['sector_origin'])
-        group = drone_groups.get(symbol)
-        if not group:
-            continue  # Skip if group not found
-
-        drone = Drone(group, sector_origin, GRID_ROWS, GRID_COLS)
-        drone.position = position
-        drone.route_index = route_index
-        drone.direction = direction
-        drones.append(drone)
+    game.player_r, game.player_c = new_r, new_c
+
+    # Response fields shared by every outcome of this move
+    player_pos = [new_r, new_c]
+    start_box_symbol = PLAYER_SYMBOL if in_start_box else EMPTY_SYMBOL
+    response = {
+        'player_move': {'from': [old_r, old_c], 'to': player_pos},
+        'start_box': {'position': PLAYER_START_POS, 'symbol': start_box_symbol},
+        'player_pos': player_pos
+    }
+
+    def end_game(won, message):
+        """Finish the game, record the attempt and build the final response."""
+        # Drone state is left as-is; the next action on a finished game is a reset
+        response['updated_stats'] = update_user_stats(game.level_id, won=won)
+        response['message'] = message
+        response['game_over'] = True
+        response['turn'] = game.turn
+        game.won = won
+        game.message = message
+        game.game_over = True
+        return jsonify(response)
+
+    # Collisions can only happen inside the grid; the start box is always safe.
+    # The boundary check above already caps both coordinates, so only row or column -1 lies outside.
+    in_grid = new_r >= 0 and new_c >= 0
 
     # Check for collision after player's move
-    if 0 <= new_r < GRID_ROWS and 0 <= new_c < GRID_COLS:
-        if is_collision(player_pos, drones):
-            session['game_over'] = True
-            session['won'] = False
-            updated_stats = update_user_stats(won=False)
-            session['message'] = "A gunshot rings out in the distnace. You turn the radio frequency preemptively."
-            # Prepare start_box data
-            start_box_symbol = PLAYER_SYMBOL if player_pos == PLAYER_START_POS else EMPTY_SYMBOL
-            return jsonify({
-                'message': session['message'],
-                'game_over': True,
-                'player_move': {'from': old_player_pos, 'to': player_pos},
-                'start_box': {'position': PLAYER_START_POS, 'symbol': start_box_symbol},
-                'player_pos': session['player_pos'],
-                'updated_stats': updated_stats
-            })
-
-    # Record drone movements
-    drone_moves = []
-
-    # Move drones
-    for drone in drones:
-        old_pos = drone.position
-        drone.move()
-        new_pos = drone.position
-        drone_moves.append({
-            'symbol': drone.symbol,
-            'from': old_pos,
-            'to': new_pos
-        })
+    if in_grid:
+        if is_collision(new_r, new_c, game.drone_occupancy, GRID_COLS):
+            return end_game(False, "A gunshot rings out in the distnace. You turn the radio frequency preemptively.")
+
+    # Advance the drones one step; their moves come from the precomputed schedule
+    game.drone_step += 1
+    response['drone_moves'] = game.drone_moves
 
     # Check for collision after drones' move
-    if 0 <= player_pos[0] < GRID_ROWS and 0 <= player_pos[1] < GRID_COLS:
-        if is_collision(player_pos, drones):
-            session['game_over'] = True
-            session['won'] = False
-            updated_stats = update_user_stats(won=False)
-            session['message'] = "A gunshot rings out in the distnace. You turn the radio frequency preemptively."
-            # Update drones in session
-            session['drones'] = [
-                {
-                    'symbol': drone.symbol,
-                    'position': drone.position,
-                    'route_index': drone.route_index,
-                    'direction': drone.direction,
-                    'sector_origin': drone.sector_origin
-                } for drone in drones
-            ]
-            # Prepare start_box data
-            start_box_symbol = PLAYER_SYMBOL if player_pos == PLAYER_START_POS else EMPTY_SYMBOL
-            return jsonify({
-                'message': session['message'],
-                'game_over': True,
-                'player_move': {'from': old_player_pos, 'to': player_pos},
-                'drone_moves': drone_moves,
-                'start_box': {'position': PLAYER_START_POS, 'symbol': start_box_symbol},
-                'player_pos': session['player_pos'],
-                'updated_stats': updated_stats
-            })
+    if in_grid:
+        if is_collision(new_r, new_c, game.drone_occupancy, GRID_COLS):
+            return end_game(False, "A gunshot rings out in the distnace. You turn the radio frequency preemptively.")
 
     # Check if player has reached the end
-    if player_pos == tuple(session['end_pos']):
-        session['game_over'] = True
-        session['won'] = True
-        updated_stats = update_user_stats(won=True)
-        session['message'] = "You've reached your target."
-        # Update drones in session
-        session['drones'] = [
-            {
-                'symbol': drone.symbol,
-                'position': drone.position,
-                'route_index': drone.route_index,
-                'direction': drone.direction,
-                'sector_origin': drone.sector_origin
-            } for drone in drones
-        ]
-        # Prepare start_box data
-        start_box_symbol = PLAYER_SYMBOL if player_pos == PLAYER_START_POS else EMPTY_SYMBOL
-        return jsonify({
-            'message': session['message'],
-            'game_over': True,
-            'player_move': {'from': old_player_pos, 'to': player_pos},
-            'drone_moves': drone_moves,
-            'start_box': {'position': PLAYER_START_POS, 'symbol': start_box_symbol},
-            'player_pos': session['player_pos'],
-            'updated_stats': updated_stats
-        })
-
-    # Update drones in session
-    session['drones'] = [
-        {
-            'symbol': drone.symbol,
-            'position': drone.position,
-            'route_index': drone.route_index,
-            'direction': drone.direction,
-            'sector_origin': drone.sector_origin
-        } for drone in drones
-    ]
+    end_r, end_c = game.end_pos
+    if new_r == end_r and new_c == end_c:
+        return end_game(True, "You've reached your target.")
 
     # Increment turn
-    session['turn'] += 1
-
-    # Optional: Check for max turns
-    if session['turn'] >= session.get('max_turns', 200):
-        session['game_over'] = True
-        session['won'] = False
-        updated_stats = update_user_stats(won=False)
-        session['message'] = "Drone tracking goes dark. There's nothing more you can do to help."
-        # Prepare start_box data
-        start_box_symbol = PLAYER_SYMBOL if player_pos == PLAYER_START_POS else EMPTY_SYMBOL
-        return jsonify({
-            'message': session['message'],
-            'game_over': True,
-            'player_move': {'from': old_player_pos, 'to': player_pos},
-            'drone_moves': drone_moves,
-            'start_box': {'position': PLAYER_START_POS, 'symbol': start_box_symbol},
-            'player_pos': session['player_pos'],
-            'updated_stats': updated_stats
-        })
-
-    session['message'] = ''
-
-    # Prepare start_box data
-    start_box_symbol = PLAYER_SYMBOL if player_pos == PLAYER_START_POS else EMPTY_SYMBOL
-
-    return jsonify({
-        'message': 'Move successful',
-        'game_over': False,
-        'player_move': {'from': old_player_pos, 'to': player_pos},
-        'drone_moves': drone_moves,
-        'start_box': {'position': PLAYER_START_POS, 'symbol': start_box_symbol},
-        'player_pos': session['player_pos']
-    })
+    game.turn += 1
+
+    # Optional: Check for max turns. The grid has no walls, so the player needs exactly the
+    # Manhattan distance in moves to reach the end; once that exceeds the turns left
+    # (each move before the winning one uses a turn), the game is already lost.
+    turns_needed = abs(end_r - new_r) + abs(end_c - new_c)
+    if game.turn >= game.max_turns or turns_needed > game.max_turns - game.turn:
+        return end_game(False, "Drone tracking goes dark. There's nothing more you can do to help.")
+
+    game.message = ''
+    response['message'] = 'Move successful'
+    response['game_over'] = False
+    # Lets the client check the drone moves continue the state it holds
+    response['turn'] = game.turn
+    return jsonify(response)
 
 @app.route('/level_leaderboard/<level_id>')
 @login_required
 def level_leaderboard(level_id):
     # Check if level exists
-    level_config = next((level for level in LEVELS if level['id'] == level_id), None)
+    level_config = LEVELS_BY_ID.get(level_id)
     if not level_config:
         return "Level not found", 404
 
@@ -814,13 +921,10 @@ from sqlalchemy import case
 @app.route('/overall_leaderboard')
 @login_required
 def overall_leaderboard():
-    # Determine level order
-    level_indices = {level['id']: idx for idx, level in enumerate(LEVELS)}
-    
     # Create a list of (condition, result) pairs
     whens = [
         (User.highest_level_completed == level_id, index)
-        for level_id, index in level_indices.items()
+        for level_id, index in LEVEL_INDICES.items()
     ]
 
     # Pass *whens as positional arguments
@@ -843,9 +947,11 @@ def overall_leaderboard():
 @login_required
 def reset():
     """Reset the game state."""
-    initialize_web_game()
+    # Restart the level being played, even if another level's page was opened since
+    game = find_current_game()
+    game = initialize_web_game(game.level_id if game is not None else None)
     # Retrieve updated stats
-    level_id = session.get('level_id')
+    level_id = game.level_id
     level_stats = UserLevelStats.query.filter_by(user_id=current_user.id, level_id=level_id).first()
     level_tries = level_stats.tries if level_stats else 0
     updated_stats = {
@@ -869,6 +975,8 @@ def apply_migrations():
 # --------------------- Main Entry Point ---------------------
 
 if __name__ == '__main__':
-    apply_migrations()
+    # Migrations run only when asked to; deployments run them once in the release phase
+    if os.environ.get('RUN_MIGRATIONS') == '1':
+        apply_migrations()
     port = int(os.environ.get('PORT', 5000))
     app.run(debug=True, host='0.0.0.0', port=port)
\ No newline at end of file
@@ -5,10 +5,16 @@ let startBox = null; // Global variable to hold start box data
 let GRID_ROWS = 0;
 let GRID_COLS = 0;
 let playerPos = null; // Global variable to hold player's current position
+let END_POS = null;
+let DRONE_SYMBOLS = [];
+let dronePositions = []; // Current drone positions, in the same order as DRONE_SYMBOLS
+let turn = null; // Turn of the state held above; each /move reply must follow on from it
 const PLAYER_SYMBOL = 'P';
+const END_SYMBOL = 'X';
+const MULTIPLE_DRONES_SYMBOL = '*';
 
 document.addEventListener('DOMContentLoaded', () => {
-    fetchGameState(true);
+    fetchGameConfig().then(() => fetchGameState(true));
 
     document.addEventListener('keydown', (event) => {
         if (gameOver) return;
@@ -60,7 +66,7 @@ document.addEventListener('DOMContentLoaded', () => {
         .then(data => {
             gameOver = data.game_over;
             document.getElementById('message').innerText = data.message;
-            fetchGameState(true); // Re-render the grid
+            resyncGame(); // The new game may have another layout; reload it and re-render the grid
     
             // Update stats if available
             if (data.updated_stats) {
@@ -132,18 +138,31 @@ function displayMessage(msg) {
     document.getElementById('message').innerText = msg;
 }
 
+// Load the layout that stays fixed for the whole game
+function fetchGameConfig() {
+    return fetch('/game_config')
+        .then(response => response.json())
+        .then(config => {
+            GRID_ROWS = config.grid_rows;
+            GRID_COLS = config.grid_cols;
+            END_POS = config.end_pos;
+            DRONE_SYMBOLS = config.drone_symbols;
+            startBox = { position: config.player_start_pos };
+        });
+}
+
 function fetchGameState(initial = false) {
     fetch('/game_state')
         .then(response => response.json())
         .then(data => {
-            startBox = data.start_box; // Update startBox variable
-            GRID_ROWS = data.grid.length;
-            GRID_COLS = data.grid[0].length;
             playerPos = data.player_pos; // Store player's current position
+            dronePositions = data.drones;
+            turn = data.turn;
+            const grid = buildGrid(playerPos, dronePositions);
             if (initial) {
-                renderGrid(data.grid, startBox);
+                renderGrid(grid, startBox);
             } else {
-                updateGrid(data.grid, startBox);
+                updateGrid(grid, startBox);
             }
             document.getElementById('message').innerText = data.message;
             gameOver = data.game_over;
@@ -161,7 +180,10 @@ function makeMove(move) {
             document.getElementById('message').innerText = data.message;
             gameOver = data.game_over;
 
-            if (data.game_over) {
+            if (data.expired) {
+                // The server no longer has this game; keep the board until the player resets
+                return;
+            } else if (data.game_over) {
                 // If game over, fetch the latest grid state
                 fetchGameState();
 
@@ -170,6 +192,12 @@ function makeMove(move) {
                     updateStats(data.updated_stats);
                 }
             } else if (data.player_move) {
+                if (data.turn !== turn + 1) {
+                    // The deltas don't continue our state (e.g. the game was replaced); reload it
+                    resyncGame();
+                    return;
+                }
+                turn = data.turn;
                 animateMovements(data);
             } else {
                 // Invalid move; refresh the grid
@@ -178,33 +206,66 @@ function makeMove(move) {
         });
 }
 
+// Reload the layout and state from the server, e.g. after the server-side game was replaced
+function resyncGame() {
+    const gridRows = GRID_ROWS;
+    const gridCols = GRID_COLS;
+    fetchGameConfig().then(() => {
+        if (GRID_ROWS !== gridRows || GRID_COLS !== gridCols) {
+            // The grid cells were rendered server-side for another layout
+            window.location.reload();
+            return;
+        }
+        fetchGameState(true);
+    });
+}
+
 function updateStats(updatedStats) {
     document.getElementById('total-tries').innerText = 'Total Casualties: ' + updatedStats.total_tries;
     document.getElementById('level-tries').innerText = 'Casualties for This Level: ' + updatedStats.level_tries;
     document.getElementById('highest-level-completed').innerText = 'Highest Mission Completed: ' + updatedStats.highest_level_completed;
 }
 
+// Rebuild the grid from the game state, following the same rules as draw_grid on the server
+function buildGrid(playerPos, dronePositions) {
+    const grid = [];
+    for (let row = 0; row < GRID_ROWS; row++) {
+        grid.push(new Array(GRID_COLS).fill(EMPTY_SYMBOL));
+    }
+
+    // Place the end position
+    grid[END_POS[0]][END_POS[1]] = END_SYMBOL;
+
+    // Place drones; a cell holding drones from different groups shows MULTIPLE_DRONES_SYMBOL
+    const cellSymbols = new Map();
+    dronePositions.forEach((position, index) => {
+        const [row, col] = position;
+        const droneSymbol = DRONE_SYMBOLS[index];
+        if (row === playerPos[0] && col === playerPos[1]) {
+            return; // Collision handled separately
+        }
+        const key = row * GRID_COLS + col;
+        const current = cellSymbols.get(key);
+        const symbol = (current === undefined || current === droneSymbol) ? droneSymbol : MULTIPLE_DRONES_SYMBOL;
+        cellSymbols.set(key, symbol);
+        grid[row][col] = symbol;
+    });
+
+    return grid;
+}
+
 function renderGrid(grid, startBox) {
     const container = document.getElementById('game-container');
-    container.innerHTML = '';
-    gridCells = [];
 
-    grid.forEach((row, rowIndex) => {
-        const rowDiv = document.createElement('div');
-        rowDiv.className = 'grid-row';
-        const rowCells = [];
-        row.forEach((cell, colIndex) => {
-            const cellDiv = document.createElement('div');
-            cellDiv.className = 'grid-cell';
-            cellDiv.innerText = cell;
-            cellDiv.setAttribute('data-row', rowIndex);
-            cellDiv.setAttribute('data-col', colIndex);
-            rowDiv.appendChild(cellDiv);
-            rowCells.push(cellDiv);
-        });
-        container.appendChild(rowDiv);
-        gridCells.push(rowCells);
-    });
+    // Pick up the grid cells rendered server-side by the /game template
+    gridCells = Array.from(container.querySelectorAll('.grid-row'), rowDiv =>
+        Array.from(rowDiv.querySelectorAll('.grid-cell'))
+    );
+
+    // Drop the start box from a previous render (e.g. after a reset)
+    if (window.startBoxDiv) {
+        window.startBoxDiv.remove();
+    }
 
     // Now render the start box cell
     const startBoxDiv = document.createElement('div');
@@ -231,18 +292,18 @@ function renderGrid(grid, startBox) {
         // Start box is above the grid
         top = -cellSize;
         left = startBox.position[1] * cellSize;
-    } else if (startBox.position[0] === grid.length) {
+    } else if (startBox.position[0] === GRID_ROWS) {
         // Start box is below the grid
-        top = grid.length * cellSize;
+        top = GRID_ROWS * cellSize;
         left = startBox.position[1] * cellSize;
     } else if (startBox.position[1] === -1) {
         // Start box is to the left of the grid
         top = startBox.position[0] * cellSize;
         left = -cellSize;
-    } else if (startBox.position[1] === grid[0].length) {
+    } else if (startBox.position[1] === GRID_COLS) {
         // Start box is to the right of the grid
         top = startBox.position[0] * cellSize;
-        left = grid[0].length * cellSize;
+        left = GRID_COLS * cellSize;
     }
 
     startBoxDiv.style.left = left + 'px';
@@ -253,19 +314,8 @@ function renderGrid(grid, startBox) {
     // Save the startBoxDiv for later use
     window.startBoxDiv = startBoxDiv;
 
-    // Manually place the player's symbol at the current position
-    if (playerPos) {
-        const row = playerPos[0];
-        const col = playerPos[1];
-        if (row >= 0 && row < gridCells.length && col >= 0 && col < gridCells[0].length) {
-            // Player is within the grid
-            const cellDiv = gridCells[row][col];
-            cellDiv.innerText = PLAYER_SYMBOL;
-        } else if (startBox && row === startBox.position[0] && col === startBox.position[1]) {
-            // Player is in the start box
-            window.startBoxDiv.innerText = PLAYER_SYMBOL;
-        }
-    }
+    // Fill in the cells and place the player
+    updateGrid(grid, startBox);
 }
 
 function updateGrid(grid, startBox) {
@@ -328,23 +378,21 @@ function animateMovements(data) {
         animations.push(animateMove(fromCell, toCell, 'player', 'P'));
     }
 
-    // Drone movements
+    // Drone movements; only drones that changed cell are sent
     if (droneMoves) {
         droneMoves.forEach(droneMove => {
-            if (droneMove.from[0] === droneMove.to[0] && droneMove.from[1] === droneMove.to[1]) {
-                return; // Skip if the drone didn't move
-            }
             const fromCell = getCell(droneMove.from[0], droneMove.from[1]);
             const toCell = getCell(droneMove.to[0], droneMove.to[1]);
 
-            animations.push(animateMove(fromCell, toCell, 'drone', droneMove.symbol));
+            animations.push(animateMove(fromCell, toCell, 'drone', DRONE_SYMBOLS[droneMove.index]));
+            dronePositions[droneMove.index] = droneMove.to;
         });
     }
 
     // Wait for all animations to complete before updating the grid
     Promise.all(animations).then(() => {
-        // Update the grid after animations
-        fetchGameState();
+        // Update the grid from the local state after animations
+        updateGrid(buildGrid(playerPos, dronePositions), startBox);
     });
 }
 